@@ -10,116 +10,301 @@ This script:
 """
 
 import os
+import re
+import glob
+import time
+import asyncio
 import sys
+import json
+import hashlib
 import argparse
+import multiprocessing
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from playwright.sync_api import sync_playwright
+from urllib.parse import urlparse, parse_qsl, urlencode
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from dataclasses import dataclass, asdict, field
 
 # Import from existing files
 from main import Business, BusinessList, extract_coordinates_from_url
-from crawler import enrich_csv
+from crawler import enrich_df, write_text_atomic
+from tools import digits_only
 
-def scrape_for_search(search_for: str, total: int = 1000) -> BusinessList:
-    """Scrape Google Maps for a given search term, returning a BusinessList."""
+# Google Maps search/place XHR responses are recorded here and replayed on later
+# runs, so re-scraping the same city does not hit the network for them again
+REPLAY_CACHE_DIR = os.path.join("output", ".maps_cache")
+REPLAY_URL_PATTERN = re.compile(r"^https://www\.google\.[^/]+/(search\?|maps/preview/place\?)")
+# Query params that change per session/request and must not be part of the cache key
+VOLATILE_PARAMS = {"authuser", "ech", "psi", "tch", "ei", "gs_ssp"}
+# Recordings older than this are fetched (and recorded) again
+REPLAY_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+# Enriched outputs younger than this are reused instead of scraping the city again
+OUTPUT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+# Optional remote browser pool (e.g. Browserless: ws://host:3000?token=...).
+# When set, chromium runs there instead of on this machine.
+BROWSERLESS_WS = os.getenv("BROWSERLESS_WS")
+
+# Images are never read by the extractor; chromium skips them itself with this
+# flag. A catch-all route would do the same but sends every request through
+# Python and, in chromium, disables the HTTP cache while it is active.
+CHROMIUM_ARGS = ["--blink-settings=imagesEnabled=false"]
+VIEWPORT = {"width": 1280, "height": 800}
+
+# Persistent chromium profiles, one per worker slot. They keep cookies and
+# consent state between runs; the HTTP/V8 caches stay cold because chromium
+# disables the HTTP cache while the replay route is installed.
+PROFILE_DIR = ".pw-profile"
+# Profile slot of this worker process (set by claim_profile_slot)
+_profile_slot = 0
+
+# CSS selectors (Playwright's CSS engine is faster than its XPath one),
+# built once here instead of per listing
+SEARCH_BOX_SELECTOR = 'input#searchboxinput'
+LISTING_SELECTOR = 'a[href*="https://www.google.com/maps/place"]'
+DETAIL_SELECTORS = {
+    'title': 'h1',
+    'address': 'button[data-item-id="address"] div[class*="fontBodyMedium"]',
+    'website': 'a[data-item-id="authority"] div[class*="fontBodyMedium"]',
+    'phone_number': 'button[data-item-id*="phone:tel:"] div[class*="fontBodyMedium"]',
+    'reviews_count': 'button[jsaction="pane.reviewChart.moreReviews"] span',
+    'reviews_average': 'div[jsaction="pane.reviewChart.moreReviews"] div[role="img"]',
+}
+
+# Body snippet shared by the details scripts: finds the clicked listing's own
+# details pane (a div[role="main"]) so reads never hit the results pane or the
+# previously opened listing. A named listing's pane is labelled with its name;
+# for an unnamed one, take the pane labelled with its own title (the results
+# pane is labelled "Results for ..." but titled "Results") other than the
+# previous listing's. Labels are compared as attribute values rather than via
+# a CSS selector to avoid escaping the name.
+FIND_PANE_JS = """
+    const findPane = (titleSelector, name, previousName) => Array.from(
+        document.querySelectorAll('div[role="main"]')
+    ).find((pane) => {
+        const label = pane.getAttribute('aria-label');
+        if (name) return label === name;
+        const title = pane.querySelector(titleSelector);
+        return !!title && label === title.innerText.trim() && label !== previousName;
+    });
+"""
+
+# Reads the details pane of the clicked listing in one page.evaluate call, or
+# returns null if the pane is not there. Text fields come back as innerText
+# (same as Locator.inner_text), or null if missing.
+EXTRACT_DETAILS_JS = """
+([selectors, name, previousName]) => {
+""" + FIND_PANE_JS + """
+    const root = findPane(selectors.title, name, previousName);
+    if (!root) return null;
+    const text = (selector) => {
+        const node = root.querySelector(selector);
+        return node ? node.innerText : null;
+    };
+    const average = root.querySelector(selectors.reviews_average);
+    return {
+        title: text(selectors.title),
+        address: text(selectors.address),
+        website: text(selectors.website),
+        phone_number: text(selectors.phone_number),
+        reviews_count: text(selectors.reviews_count),
+        reviews_average: average ? average.getAttribute('aria-label') : null,
+    };
+}
+"""
+
+# Scrolls the results feed until `total` listings are attached or the feed stops
+# growing. After each scroll it waits for the feed to mutate (new results) but at
+# most 1.5s; three quiet scrolls in a row mean the end of the results.
+SCROLL_FEED_JS = """
+async ([listingSelector, total]) => {
+    const quietMs = 1500;
+    const count = () => document.querySelectorAll(listingSelector).length;
+    const feed = document.querySelector('div[role="feed"]');
+    if (!feed) return count();
+
+    const waitForMutation = () => new Promise((resolve) => {
+        const timer = setTimeout(() => { observer.disconnect(); resolve(); }, quietMs);
+        const observer = new MutationObserver(() => {
+            clearTimeout(timer);
+            observer.disconnect();
+            // give the batch of results a moment to finish rendering
+            setTimeout(resolve, 300);
+        });
+        observer.observe(feed, { childList: true, subtree: true });
+    });
+
+    let previous = count();
+    let stable = 0;
+    while (true) {
+        feed.scrollTop = feed.scrollHeight;
+        await waitForMutation();
+        const current = count();
+        if (current >= total) return current;
+        if (current === previous) {
+            if (++stable >= 3) return current;
+        } else {
+            stable = 0;
+            previous = current;
+        }
+    }
+}
+"""
+
+# True once the clicked listing's own pane is attached and shows its title
+DETAILS_READY_JS = """
+([titleSelector, name, previousName]) => {
+""" + FIND_PANE_JS + """
+    const pane = findPane(titleSelector, name, previousName);
+    const title = pane && pane.querySelector(titleSelector);
+    return !!title && title.innerText.trim() !== '';
+}
+"""
+# Upper bound for the details panel to switch to the clicked listing
+DETAILS_TIMEOUT_MS = 8000
+
+
+def replay_cache_key(url: str) -> str:
+    """Build a stable cache key for a Google Maps XHR url (session params stripped)."""
+    parsed = urlparse(url)
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k not in VOLATILE_PARAMS
+    )
+    normalized = f"{parsed.path}?{urlencode(params)}"
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def load_replay(cache_path: str):
+    """Load a recorded response, or None if there is no fresh, usable recording."""
+    try:
+        if time.time() - os.path.getmtime(cache_path) >= REPLAY_MAX_AGE_SECONDS:
+            return None
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+async def replay_route(route, refresh: bool = False):
+    """Serve a recorded response if we have one, otherwise fetch it and record it.
+
+    With refresh set, recordings are ignored and replaced by fresh responses.
+    If anything goes wrong the request is passed on untouched, so a cache
+    problem never leaves a page waiting on an unanswered request.
+    """
+    try:
+        cache_path = os.path.join(REPLAY_CACHE_DIR, replay_cache_key(route.request.url) + ".json")
+        recorded = None if refresh else load_replay(cache_path)
+
+        if recorded is None:
+            response = await route.fetch()
+            # body is stored and served decoded, so drop headers describing the wire encoding
+            headers = {
+                k: v for k, v in response.headers.items()
+                if k.lower() not in ("content-encoding", "content-length")
+            }
+            recorded = {"status": response.status, "headers": headers, "body": await response.text()}
+            if response.ok:
+                # Several pages record at once: replace the file atomically so
+                # nobody reads (or writes over) a half-written recording
+                write_text_atomic(cache_path, json.dumps(recorded))
+    except Exception as e:
+        print(f"Replay cache error, passing request through: {e}")
+        await route.fallback()
+        return
+
+    await route.fulfill(status=recorded["status"], headers=recorded["headers"], body=recorded["body"])
+
+
+async def scrape_for_search(context, search_for: str, total: int = 1000, force: bool = False) -> BusinessList:
+    """Scrape Google Maps for a given search term, returning a BusinessList.
+
+    Runs in its own page of the shared browser context so several searches can
+    be scraped concurrently; only the page is closed at the end. With force
+    set, recorded Maps responses are refreshed instead of replayed.
+    """
     
     business_list = BusinessList()
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)  # Keep visible for debugging, change to True for production
-        page = browser.new_page()
+    page = await context.new_page()
+    try:
+        # One-argument lambda: Playwright passes (route, request) to handlers
+        # that accept more parameters
+        await page.route(REPLAY_URL_PATTERN, lambda route: replay_route(route, refresh=force))
 
-        page.goto("https://www.google.com/maps", timeout=60000)
-        page.wait_for_timeout(5000)
+        await page.goto("https://www.google.com/maps", timeout=60000)
+        await page.wait_for_selector(SEARCH_BOX_SELECTOR, state='visible')
 
         print(f"Searching for: {search_for}")
 
-        page.locator('//input[@id="searchboxinput"]').fill(search_for)
-        page.wait_for_timeout(3000)
-
-        page.keyboard.press("Enter")
-        page.wait_for_timeout(5000)
-
-        # scrolling
-        page.hover('//a[contains(@href, "https://www.google.com/maps/place")]')
-
-        previously_counted = 0
-        while True:
-            page.mouse.wheel(0, 10000)
-            page.wait_for_timeout(3000)
-
-            if (
-                page.locator(
-                    '//a[contains(@href, "https://www.google.com/maps/place")]'
-                ).count()
-                >= total
-            ):
-                listings = page.locator(
-                    '//a[contains(@href, "https://www.google.com/maps/place")]'
-                ).all()[:total]
-                print(f"Total Scraped for '{search_for}': {len(listings)}")
-                break
-            else:
-                if (
-                    page.locator(
-                        '//a[contains(@href, "https://www.google.com/maps/place")]'
-                    ).count()
-                    == previously_counted
-                ):
-                    listings = page.locator(
-                        '//a[contains(@href, "https://www.google.com/maps/place")]'
-                    ).all()
-                    print(f"Arrived at all available for '{search_for}'\nTotal Scraped: {len(listings)}")
-                    break
-                else:
-                    previously_counted = page.locator(
-                        '//a[contains(@href, "https://www.google.com/maps/place")]'
-                    ).count()
-                    print(
-                        f"Currently Scraped for '{search_for}': ",
-                        page.locator(
-                            '//a[contains(@href, "https://www.google.com/maps/place")]'
-                        ).count(),
-                    )
+        await page.locator(SEARCH_BOX_SELECTOR).fill(search_for)
+
+        await page.keyboard.press("Enter")
+        await page.wait_for_selector(LISTING_SELECTOR, state='visible')
+
+        # scrolling: a single in-page loop instead of wheel/sleep/count round-trips
+        listings_loc = page.locator(LISTING_SELECTOR)
+        count = await page.evaluate(SCROLL_FEED_JS, [LISTING_SELECTOR, total])
+        listings = (await listings_loc.all())[:total]
+        if count >= total:
+            print(f"Total Scraped for '{search_for}': {len(listings)}")
+        else:
+            print(f"Arrived at all available for '{search_for}'\nTotal Scraped: {len(listings)}")
 
         # scraping
+        previous_name = None
         for listing in listings:
             try:
-                listing.click()
-                page.wait_for_timeout(5000)
-
-                name_attribute = 'aria-label'
-                address_xpath = '//button[@data-item-id="address"]//div[contains(@class, "fontBodyMedium")]'
-                website_xpath = '//a[@data-item-id="authority"]//div[contains(@class, "fontBodyMedium")]'
-                phone_number_xpath = '//button[contains(@data-item-id, "phone:tel:")]//div[contains(@class, "fontBodyMedium")]'
-                review_count_xpath = '//button[@jsaction="pane.reviewChart.moreReviews"]//span'
-                reviews_average_xpath = '//div[@jsaction="pane.reviewChart.moreReviews"]//div[@role="img"]'
-                
+                # Business name: aria-label on the anchor; it also labels the
+                # details pane the click opens, which is what we wait for
+                name_attr_val = await listing.get_attribute('aria-label')
+                previous_url = page.url
+
+                await listing.click()
+                # Wait for this listing's pane instead of a fixed sleep: first for
+                # the click to move the page to a new place URL (the only signal
+                # for unnamed listings, and for branches sharing the previous
+                # listing's name), then for the pane itself to show its title
+                try:
+                    await page.wait_for_url(
+                        lambda url: url != previous_url and "/maps/place/" in url,
+                        wait_until="commit",
+                        timeout=DETAILS_TIMEOUT_MS,
+                    )
+                    await page.wait_for_function(
+                        DETAILS_READY_JS,
+                        arg=[DETAIL_SELECTORS['title'], name_attr_val, previous_name],
+                        timeout=DETAILS_TIMEOUT_MS,
+                    )
+                except PlaywrightTimeoutError:
+                    print(f"✗ Details pane did not open for '{name_attr_val or 'unnamed listing'}', skipping")
+                    continue
+
+                # Read every field of the details pane in a single round-trip
+                details = await page.evaluate(
+                    EXTRACT_DETAILS_JS, [DETAIL_SELECTORS, name_attr_val, previous_name]
+                )
+                if details is None:
+                    print(f"✗ Details pane closed before it was read for '{name_attr_val or 'unnamed listing'}', skipping")
+                    continue
+
                 business = Business()
 
-                # Business name: prefer aria-label on the anchor; fallback to details title
-                name_attr_val = listing.get_attribute(name_attribute)
                 if name_attr_val:
                     business.name = name_attr_val
                 else:
                     # fallback from details panel
-                    title_loc = page.locator('//h1')
-                    business.name = title_loc.first.inner_text().strip() if title_loc.count() > 0 else ""
-                if page.locator(address_xpath).count() > 0:
-                    business.address = page.locator(address_xpath).all()[0].inner_text()
-                else:
-                    business.address = ""
-                if page.locator(website_xpath).count() > 0:
-                    business.website = page.locator(website_xpath).all()[0].inner_text()
-                else:
-                    business.website = ""
-                if page.locator(phone_number_xpath).count() > 0:
-                    business.phone_number = page.locator(phone_number_xpath).all()[0].inner_text()
-                else:
-                    business.phone_number = ""
-                if page.locator(review_count_xpath).count() > 0:
+                    business.name = (details['title'] or "").strip()
+                previous_name = business.name
+                business.address = details['address'] or ""
+                business.website = details['website'] or ""
+                business.phone_number = details['phone_number'] or ""
+                if details['reviews_count'] is not None:
                     business.reviews_count = int(
-                        page.locator(review_count_xpath).inner_text()
+                        details['reviews_count']
                         .split()[0]
                         .replace(',','')
                         .strip()
@@ -127,16 +312,13 @@ def scrape_for_search(search_for: str, total: int = 1000) -> BusinessList:
                 else:
                     business.reviews_count = ""
                     
-                if page.locator(reviews_average_xpath).count() > 0:
-                    avg_attr = page.locator(reviews_average_xpath).get_attribute(name_attribute)
-                    if avg_attr:
-                        try:
-                            business.reviews_average = float(
-                                avg_attr.split()[0].replace(',', '.').strip()
-                            )
-                        except Exception:
-                            business.reviews_average = ""
-                    else:
+                avg_attr = details['reviews_average']
+                if avg_attr:
+                    try:
+                        business.reviews_average = float(
+                            avg_attr.split()[0].replace(',', '.').strip()
+                        )
+                    except Exception:
                         business.reviews_average = ""
                 else:
                     business.reviews_average = ""
@@ -147,18 +329,66 @@ def scrape_for_search(search_for: str, total: int = 1000) -> BusinessList:
                 business_list.business_list.append(business)
             except Exception as e:
                 print(f'Error occurred: {e}')
-        
-        browser.close()
+    finally:
+        await page.close()
     
     return business_list
 
-def process_city(city: str, total: int):
-    """Process a single city: scrape, dedupe, enrich, and save."""
+
+def claim_profile_slot(slots):
+    """Pool initializer: give this worker process its own browser profile slot."""
+    global _profile_slot
+    _profile_slot = slots.get()
+
+
+async def scrape_keywords(searches: list[str], total: int, force: bool = False) -> list[BusinessList]:
+    """Scrape all searches concurrently, sharing a single browser context between them.
+
+    Locally the context is persistent (kept in PROFILE_DIR), so cookies and
+    consent state survive between runs.
+    """
+
+    async with async_playwright() as p:
+        if BROWSERLESS_WS:
+            browser = await p.chromium.connect_over_cdp(BROWSERLESS_WS)
+            context = await browser.new_context(viewport=VIEWPORT)
+        else:
+            # Chromium locks a profile dir, so every parallel worker needs its own
+            profile_dir = os.path.join(PROFILE_DIR, str(_profile_slot))
+            context = await p.chromium.launch_persistent_context(
+                profile_dir, headless=True, viewport=VIEWPORT, args=CHROMIUM_ARGS
+            )
+        try:
+            return await asyncio.gather(
+                *(scrape_for_search(context, search_for, total, force) for search_for in searches)
+            )
+        finally:
+            await context.close()
+            if BROWSERLESS_WS:
+                await browser.close()
+
+
+def process_city(city: str, total: int, force: bool = False):
+    """Process a single city: scrape, dedupe, enrich, and save.
+
+    Skips the city if its enriched output was written less than
+    OUTPUT_MAX_AGE_SECONDS ago, unless force is set.
+    """
     
     print(f"\n{'='*60}")
     print(f"Processing city: {city}")
     print(f"{'='*60}\n")
     
+    city_clean = city.replace(' ', '_')
+
+    # Disk-level cache: reuse a fresh previous run instead of scraping again
+    final_paths = glob.glob(os.path.join("output", f"{glob.escape(city_clean)}_enriched*.csv"))
+    if final_paths and not force:
+        age = time.time() - max(os.path.getmtime(path) for path in final_paths)
+        if age < OUTPUT_MAX_AGE_SECONDS:
+            print(f"Cached: {city} was processed {age / 3600:.1f}h ago, skipping (use --force to redo)")
+            return
+    
     # Hardcoded keywords
     keywords = [
         "roofing company",
@@ -168,123 +398,91 @@ def process_city(city: str, total: int):
         "roofing services"
     ]
 
-    all_businesses = []
-
-    # Scrape for each keyword
-    for keyword in keywords:
-        search_for = f"{keyword} in {city}"
-        business_list = scrape_for_search(search_for, total)
-        all_businesses.extend(business_list.business_list)
+    # Scrape all keywords concurrently in one browser
+    searches = [f"{keyword} in {city}" for keyword in keywords]
+    frames = []
+    for search_for, business_list in zip(searches, asyncio.run(scrape_keywords(searches, total, force))):
+        frames.append(business_list.dataframe())
         print(f"Collected {len(business_list.business_list)} businesses for '{search_for}'")
 
-    # Create combined BusinessList
-    combined_list = BusinessList()
-    combined_list.business_list = all_businesses
-
-    # Convert to dataframe
-    df = combined_list.dataframe()
-
-    # Deduplicate by name, merging phone numbers if different
-    def join_phones(series):
-        phones = series.dropna().astype(str).str.strip()
-        phones = phones[phones != ''].unique()
-        return '; '.join(phones) if len(phones) > 0 else None
-
-    df_deduped = df.groupby('name').agg({
-        'address': 'first',
-        'website': 'first', 
-        'phone_number': join_phones,
-        'reviews_count': 'first',
-        'reviews_average': 'first',
-        'latitude': 'first',
-        'longitude': 'first'
-    }).reset_index()
-
-    # Save deduped CSV temporarily
-    temp_csv = "output/temp_combined.csv"
-    os.makedirs("output", exist_ok=True)
-    df_deduped.to_csv(temp_csv, index=False)
-    print(f"Saved combined deduped data to {temp_csv}")
+    # Combine the per-keyword dataframes in one columnar concat
+    df = pd.concat(frames, ignore_index=True)
+
+    # Deduplicate by name: keep the first row of every company, then merge the
+    # (distinct, non-empty) phone numbers of all its rows into one field
+    df = df.dropna(subset=['name'])
+    df_first = df.drop_duplicates(subset=['name'], keep='first').set_index('name')
+
+    phones = pd.DataFrame({
+        'name': df['name'],
+        'phone_number': df['phone_number'].fillna('').astype(str).str.strip(),
+    })
+    phones = phones[phones['phone_number'] != ''].drop_duplicates()
+    joined_phones = phones.groupby('name', sort=False)['phone_number'].agg('; '.join)
+
+    df_deduped = df_first.assign(phone_number=joined_phones).reset_index()
 
-    # Enrich the CSV
-    enriched_path = enrich_csv(temp_csv)
-    print(f"Enriched data saved to {enriched_path}")
+    os.makedirs("output", exist_ok=True)
 
-    # Load the enriched CSV to split and clean
-    df_enriched = pd.read_csv(enriched_path, dtype={'Phone': str, 'Additional Phones': str})
+    # Enrich the deduped data in memory (no temp CSV round-trip)
+    df_enriched = enrich_df(df_deduped)
+    print(f"Enriched {len(df_enriched)} companies for {city}")
     
     # Process Phone columns: ensure +1 prefix and remove duplicates between Phone and Additional Phones
-    def add_plus1(phone_str):
-        """Add +1 prefix to phone number if not present."""
-        if pd.isna(phone_str) or phone_str == '' or str(phone_str).lower() == 'nan':
-            return ''
-        phone_str = str(phone_str).strip()
+    def add_plus1(phones):
+        """Add +1 prefix to every phone number in the series if not present."""
+        phones = phones.fillna('').astype(str).str.strip()
+        phones = phones.mask(phones.str.lower() == 'nan', '')
         
         # Remove .0 if present (from pandas reading as float)
-        if phone_str.endswith('.0'):
-            phone_str = phone_str[:-2]
+        phones = phones.str.replace(r'\.0$', '', regex=True)
         
-        if not phone_str.startswith('+'):
-            # Remove any non-digit characters first
-            digits = ''.join(filter(str.isdigit, phone_str))
-            if len(digits) == 10:
-                return '+1' + digits
-            elif len(digits) == 11 and digits.startswith('1'):
-                return '+' + digits
-            elif digits:  # Any other digits, try to format
-                return '+1' + digits if len(digits) == 10 else phone_str
-        return phone_str
+        # Only numbers without a leading + get a prefix, based on their digit count
+        digits = phones.map(digits_only)
+        needs_prefix = ~phones.str.startswith('+')
+        is_10 = needs_prefix & (digits.str.len() == 10)
+        is_11 = needs_prefix & (digits.str.len() == 11) & digits.str.startswith('1')
+        return phones.mask(is_10, '+1' + digits).mask(is_11, '+' + digits)
     
     # Add +1 to Phone column
     if 'Phone' in df_enriched.columns:
-        df_enriched['Phone'] = df_enriched['Phone'].apply(add_plus1)
+        df_enriched['Phone'] = add_plus1(df_enriched['Phone'])
     
     # Process Additional Phones: add +1 and remove duplicates with Phone column
     if 'Additional Phones' in df_enriched.columns and 'Phone' in df_enriched.columns:
-        def clean_additional_phones(row):
-            main_phone = str(row.get('Phone', '')).strip()
-            addl_phones = str(row.get('Additional Phones', '')).strip()
-            
-            if not addl_phones or addl_phones == 'nan':
-                return ''
-            
-            # Split by comma, add +1, and filter out the main phone
-            phones = [add_plus1(p.strip()) for p in addl_phones.split(',')]
-            phones = [p for p in phones if p and p != main_phone]
-            
-            return ', '.join(phones) if phones else ''
+        addl_phones = df_enriched['Additional Phones'].fillna('').astype(str).str.strip()
+        addl_phones = addl_phones.mask(addl_phones == 'nan', '')
+        
+        # One row per phone (index repeats per company), add +1, and filter out the main phone
+        phones = add_plus1(addl_phones.str.split(',').explode())
+        main_phone = df_enriched['Phone'].astype(str).str.strip().reindex(phones.index)
+        phones = phones[(phones != '') & (phones != main_phone)]
+        # Drop a phone listed twice for the same company (same index and number)
+        phones = phones[~phones.reset_index().duplicated().to_numpy()]
         
-        df_enriched['Additional Phones'] = df_enriched.apply(clean_additional_phones, axis=1)
+        df_enriched['Additional Phones'] = (
+            phones.groupby(level=0).agg(', '.join).reindex(df_enriched.index, fill_value='')
+        )
     
     # Split Email column into Email and Additional Emails
     if 'Email' in df_enriched.columns:
-        def split_emails(email_str):
-            """Split comma-separated emails into first email and additional emails."""
-            if pd.isna(email_str) or email_str == '':
-                return '', ''
-            
-            emails = [e.strip() for e in str(email_str).split(',') if e.strip()]
-            if not emails:
-                return '', ''
-            elif len(emails) == 1:
-                return emails[0], ''
-            else:
-                return emails[0], ', '.join(emails[1:])
-        
-        df_enriched[['Email', 'Additional Emails']] = df_enriched['Email'].apply(
-            lambda x: pd.Series(split_emails(x))
-        )
+        # First email and the rest, dropping blanks (same rule as fix_csv.py)
+        emails = [
+            [e for e in (e.strip() for e in email.split(',')) if e]
+            for email in df_enriched['Email'].fillna('').astype(str)
+        ]
+        df_enriched['Email'] = [e[0] if e else '' for e in emails]
+        df_enriched['Additional Emails'] = [', '.join(e[1:]) for e in emails]
     
     # Remove unwanted columns
     columns_to_remove = ['latitude', 'longitude', 'reviews_count', 'reviews_average']
-    df_enriched = df_enriched.drop(columns=[col for col in columns_to_remove if col in df_enriched.columns], errors='ignore')
+    df_enriched = df_enriched.drop(columns=df_enriched.columns.intersection(columns_to_remove))
     
-    # Split into chunks of 80 rows
+    # Split into chunks of 100 rows
     chunk_size = 100
     total_rows = len(df_enriched)
-    num_chunks = (total_rows + chunk_size - 1) // chunk_size  # Ceiling division
-    
-    city_clean = city.replace(' ', '_')
+    chunks = [df_enriched.iloc[i:i + chunk_size] for i in range(0, total_rows, chunk_size)]
+    num_chunks = len(chunks)
     
     if num_chunks == 1:
         # Single file, no suffix needed
@@ -293,26 +491,37 @@ def process_city(city: str, total: int):
         print(f"Final enriched file: {final_path}")
     else:
         # Multiple files with _1, _2, etc.
-        for i in range(num_chunks):
-            start_idx = i * chunk_size
-            end_idx = min((i + 1) * chunk_size, total_rows)
-            df_chunk = df_enriched.iloc[start_idx:end_idx]
-            
-            final_path = os.path.join("output", f"{city_clean}_enriched_{i+1}.csv")
+        for i, df_chunk in enumerate(chunks, 1):
+            final_path = os.path.join("output", f"{city_clean}_enriched_{i}.csv")
             df_chunk.to_csv(final_path, index=False)
-            print(f"Final enriched file {i+1}/{num_chunks}: {final_path} ({len(df_chunk)} rows)")
-    
-    # Clean up temp files
-    if os.path.exists(temp_csv):
-        os.remove(temp_csv)
-    if os.path.exists(enriched_path):
-        os.remove(enriched_path)
+            print(f"Final enriched file {i}/{num_chunks}: {final_path} ({len(df_chunk)} rows)")
+
+
+def run_city(idx: int, num_cities: int, city: str, total: int, retries: int, force: bool) -> bool:
+    """Process a city, retrying failed attempts. Returns True on success."""
+
+    print(f"\n{'#'*60}")
+    print(f"City {idx}/{num_cities}: {city}")
+    print(f"{'#'*60}")
+
+    for attempt in range(1, retries + 2):
+        try:
+            process_city(city, total, force)
+            print(f"\n✓ Successfully completed processing for {city}")
+            return True
+        except Exception as e:
+            print(f"\n✗ Error processing {city} (attempt {attempt}/{retries + 1}): {e}")
+    print(f"Giving up on {city}, continuing to next city...\n")
+    return False
 
 
 def main():
     parser = argparse.ArgumentParser(description="Scrape and enrich roofing companies data for one or more cities.")
     parser.add_argument("-c", "--city", type=str, required=True, help="City name(s) to search in. Separate multiple cities with commas (e.g., 'Houston Texas, Miami Florida, New York NY')")
     parser.add_argument("-t", "--total", type=int, default=100, help="Maximum number of listings to scrape per keyword (default: 100)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Number of cities to process in parallel (default: 4, capped at the number of cities). Match it to the BROWSERLESS_WS pool size when using a remote browser")
+    parser.add_argument("-r", "--retries", type=int, default=0, help="How many times to retry a city that failed (default: 0)")
+    parser.add_argument("-f", "--force", action="store_true", help="Re-process cities even if a fresh enriched output already exists, and refresh recorded Maps responses")
     args = parser.parse_args()
 
     # Parse cities - split by comma and strip whitespace
@@ -321,22 +530,28 @@ def main():
 
     print(f"Cities to process: {cities}")
     print(f"Max listings per keyword: {total}\n")
+    if BROWSERLESS_WS:
+        print("Using remote browser pool from BROWSERLESS_WS\n")
 
-    # Process each city sequentially
-    for idx, city in enumerate(cities, 1):
-        print(f"\n{'#'*60}")
-        print(f"City {idx}/{len(cities)}: {city}")
-        print(f"{'#'*60}")
-        
-        try:
-            process_city(city, total)
-            print(f"\n✓ Successfully completed processing for {city}")
-        except Exception as e:
-            print(f"\n✗ Error processing {city}: {e}")
-            print("Continuing to next city...\n")
+    # Cities are queued and picked up by up to `workers` processes at a time;
+    # each process runs its own Playwright driver and browser
+    workers = max(1, min(args.workers, len(cities)))
+    profile_slots = multiprocessing.Queue()
+    for slot in range(workers):
+        profile_slots.put(slot)
+    with ProcessPoolExecutor(max_workers=workers, initializer=claim_profile_slot, initargs=(profile_slots,)) as executor:
+        results = list(executor.map(
+            run_city,
+            range(1, len(cities) + 1),
+            repeat(len(cities)),
+            cities,
+            repeat(total),
+            repeat(args.retries),
+            repeat(args.force),
+        ))
     
     print(f"\n{'='*60}")
-    print(f"All cities processed!")
+    print(f"All cities processed! ({sum(results)}/{len(cities)} succeeded)")
     print(f"{'='*60}")
 
 if __name__ == "__main__":
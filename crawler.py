@@ -28,17 +28,24 @@ from dotenv import load_dotenv
 load_dotenv()  # Load variables from .env file
 
 
-import re
 import os
-import math
-from typing import Callable, Iterable, List, Optional, Tuple
-from email_validator import validate_email, EmailNotValidError
+import json
+import time
+import hashlib
+import tempfile
+import functools
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from email_validator import validate_email, caching_resolver, EmailNotValidError, EmailUndeliverableError
+from email_validator.deliverability import validate_email_deliverability
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse, urlunparse
 
-from tools import extract_contacts
+from tools import USER_AGENT, extract_contacts, digits_only
 
 print("entering crawler.py")
 
@@ -46,11 +53,42 @@ print("entering crawler.py")
 # Update this path to the CSV you want to enrich (use forward slashes for portability)
 INPUT_CSV = r"output/google_maps_data_Roofing_Companies_in_Austin.csv"
 REQUEST_TIMEOUT_SECONDS = 20
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/121.0.0.0 Safari/537.36"
-)
+# Number of websites fetched in parallel (the fetches are I/O-bound)
+FETCH_CONCURRENCY = 16
+# Only the first 512KB of a page is read; contacts sit near the top and the rest
+# is mostly inline JS/CSS that would just slow down the contact regexes
+MAX_HTML_BYTES = 512 * 1024
+# Fetched pages are kept on disk (keyed by URL hash) so reruns skip the network
+PAGE_CACHE_DIR = os.path.join("output", ".page_cache")
+PAGE_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+# DNS lookups for email deliverability give up after this many seconds
+DNS_TIMEOUT_SECONDS = 2
+
+
+def make_session() -> requests.Session:
+    """Build a Session that keeps connections alive and pools them per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=100,
+        pool_maxsize=100,
+        # Rate limits (429) and overload (503) are retried after the server's
+        # Retry-After, so a busy API doesn't turn a valid phone into a rejection
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=(429, 503),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+# Shared by all fetches so repeat hosts skip the DNS/TCP/TLS handshakes
+_SESSION = make_session()
 
 
 # ------------ Verification stub (customize me) ------------
@@ -60,21 +98,118 @@ USER_AGENT = (
 API_KEY = os.getenv("API_KEY")
 API_URL = "https://api.phone-check.xyz/v1-get-phone-details"
 
-def verify_phone(number: str) -> bool:
+# Number of phone verification requests in flight at once (kept modest: the
+# API is billable and rate limited)
+VERIFY_CONCURRENCY = 8
+
+# Verification results by digit-only number, kept between runs so the same
+# number is never sent to the (billable) API twice
+VERIFY_CACHE_PATH = os.path.join("output", ".phone_verify_cache.json")
+
+
+def write_text_atomic(path: str, text: str) -> None:
+    """Write text to path via a temp file and os.replace.
+
+    Other processes reading path see either the old or the new file, never a
+    half-written one.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_verify_cache(path: str = VERIFY_CACHE_PATH) -> Dict[str, bool]:
+    """Load persisted verification results; empty if missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {str(k): bool(v) for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_verify_cache(path: str = VERIFY_CACHE_PATH) -> None:
+    """Merge this run's verification results into the cache file."""
+    merged = load_verify_cache(path)
+    merged.update(_verify_cache)
+    write_text_atomic(path, json.dumps(merged))
+
+
+_verify_cache: Dict[str, bool] = load_verify_cache()
+
+
+def verify_phone(number_str: str) -> bool:
     """
     Validate phone number using Phone-Check.xyz API.
+    Expects a digit-only string, e.g. from digits_only().
     Returns True only if:
       ✅ valid number
       ✅ mobile or mobile-capable
       ❌ not disposable
+
+    Results are cached per national number (see national_number), so
+    5125552222 and 15125552222 share one request; failed requests are not cached.
+    Numbers that can't be US phones are rejected locally, without a request.
     """
-    if not API_KEY:
-        raise ValueError("PHONE_CHECK_API_KEY not set in environment variables")
+    number_str = national_number(number_str)
+    if not is_plausible_us_number(number_str):
+        return False
+
+    if number_str not in _verify_cache:
+        result = query_phone_api(number_str)
+        if result is None:
+            return False
+        _verify_cache[number_str] = result
+    return _verify_cache[number_str]
+
+
+def verify_phones(numbers: Iterable[str]) -> Dict[str, bool]:
+    """Verify many digit-only numbers concurrently.
+
+    Maps each national number (see national_number) to its verdict.
+    """
+    unique_numbers = list(dict.fromkeys(map(national_number, numbers)))
+    if not unique_numbers:
+        return {}
+    with ThreadPoolExecutor(max_workers=VERIFY_CONCURRENCY) as executor:
+        return dict(zip(unique_numbers, executor.map(verify_phone, unique_numbers)))
+
 
-    # Clean number (digits only)
-    number_str = ''.join(filter(str.isdigit, str(number)))
-    if not number_str:
+def national_number(number_str: str) -> str:
+    """Drop the country code 1 from an 11-digit number; other strings are returned as is."""
+    if len(number_str) == 11 and number_str.startswith("1"):
+        return number_str[1:]
+    return number_str
+
+
+def is_plausible_us_number(number_str: str) -> bool:
+    """Cheap local check that a digit-only string can be a NANP number.
+
+    Accepts 10 digits, or 11 with a leading country code 1, whose area code
+    and exchange both start with 2-9.
+    """
+    number_str = national_number(number_str)
+    if len(number_str) != 10:
         return False
+    return number_str[0] not in "01" and number_str[3] not in "01"
+
+
+def query_phone_api(number_str: str) -> Optional[bool]:
+    """Ask the Phone-Check.xyz API about a digit-only number.
+
+    Returns the verification verdict, or None if the request failed.
+    """
+    if not API_KEY:
+        raise ValueError("PHONE_CHECK_API_KEY not set in environment variables")
 
     try:
         params = {
@@ -82,7 +217,7 @@ def verify_phone(number: str) -> bool:
             "x-api-key": API_KEY
         }
 
-        response = requests.get(API_URL, params=params, timeout=10)
+        response = _SESSION.get(API_URL, params=params, timeout=10)
         response.raise_for_status()
 
         data = response.json()
@@ -110,18 +245,31 @@ def verify_phone(number: str) -> bool:
 
     except requests.RequestException as e:
         print(f"API request error: {e}")
-        return False
+        return None
     except Exception as e:
         print(f"Unexpected error: {e}")
-        return False
+        return None
 
 
-    except requests.RequestException as e:
-        print(f"API request error: {e}")
-        return False
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+# ------------ Email deliverability ------------
+
+_DNS_RESOLVER = caching_resolver(timeout=DNS_TIMEOUT_SECONDS)
+
+
+@functools.lru_cache(maxsize=None)
+def domain_accepts_email(ascii_domain: str) -> bool:
+    """Check that a domain has an MX (or A/AAAA fallback) record.
+
+    Memoized for the whole run, negative results included, so each distinct
+    domain costs at most one round of DNS lookups.
+    """
+    try:
+        validate_email_deliverability(ascii_domain, ascii_domain, dns_resolver=_DNS_RESOLVER)
+    except EmailUndeliverableError:
         return False
+    return True
+
+
 # ------------ Helpers ------------
 
 def normalize_url(raw: str) -> Optional[str]:
@@ -131,10 +279,16 @@ def normalize_url(raw: str) -> Optional[str]:
     - Adds scheme https:// if missing.
     - Adds "www." for bare domains like example.com; leaves subdomains intact.
     - Returns None if the input cannot yield a valid host.
+    - Results are memoized, so repeated websites skip urlparse.
     """
     if raw is None:
         return None
-    s = str(raw).strip()
+    return _normalize_url_cached(str(raw))
+
+
+@functools.lru_cache(maxsize=10_000)
+def _normalize_url_cached(raw: str) -> Optional[str]:
+    s = raw.strip()
     if not s or s.lower() in {"nan", "none", "null"}:
         return None
 
@@ -163,37 +317,73 @@ def normalize_url(raw: str) -> Optional[str]:
     return normalized
 
 
+def page_cache_path(url: str) -> str:
+    """Cache file for a normalized URL."""
+    return os.path.join(PAGE_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html")
+
+
 def fetch_page_text(url: str) -> str:
+    """Return page text from the on-disk cache, downloading it on a miss.
+
+    Only successful downloads are cached; entries expire after
+    PAGE_CACHE_MAX_AGE_SECONDS.
+    """
+    cache_path = page_cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(cache_path) < PAGE_CACHE_MAX_AGE_SECONDS:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return f.read()
+    except OSError:
+        pass
+
+    text = download_page_text(url)
+    if text:
+        write_text_atomic(cache_path, text)
+    return text
+
+
+def download_page_text(url: str) -> str:
     """Fetch page text via HTTP GET with basic headers/timeouts.
 
+    The body is streamed and truncated at MAX_HTML_BYTES.
     Returns empty string on failure.
     """
     try:
-        resp = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT_SECONDS)
-        resp.raise_for_status()
-        return resp.text or ""
+        with _SESSION.get(url, timeout=REQUEST_TIMEOUT_SECONDS, stream=True) as resp:
+            resp.raise_for_status()
+            body = bytearray()
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                body += chunk
+                if len(body) >= MAX_HTML_BYTES:
+                    break
+            body = bytes(body[:MAX_HTML_BYTES])
+            try:
+                return body.decode(resp.encoding or "utf-8", errors="replace")
+            except LookupError:
+                # Unknown charset name in the Content-Type header
+                return body.decode("utf-8", errors="replace")
     except Exception:
         return ""
 
 
-def digits_only(s: str) -> str:
-    """Return only the digits from a string."""
-    return re.sub(r"\D", "", s or "")
+def fetch_pages(urls: Iterable[str]) -> Dict[str, str]:
+    """Fetch all distinct URLs concurrently and map each URL to its page text.
 
-
-def clean_csv_phone_for_save(s: str) -> str:
-    """Remove dashes from CSV phone before saving (per requirement)."""
-    if s is None or (isinstance(s, float) and math.isnan(s)):
-        return ""
-    return str(s).replace("-", "").strip()
+    Failed fetches map to an empty string, like fetch_page_text.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as executor:
+        return dict(zip(unique_urls, executor.map(fetch_page_text, unique_urls)))
 
 
 def dedupe_preserve_order(values: Iterable[str]) -> List[str]:
-    """De-duplicate values by their digit-only key, preserving first occurrence order."""
+    """De-duplicate values by their national number, preserving first occurrence order."""
     seen = set()
     result: List[str] = []
     for v in values:
-        key = digits_only(v)
+        key = national_number(digits_only(v))
         if not key:
             continue
         if key in seen:
@@ -211,6 +401,9 @@ def format_us_phone_e164(value: str) -> Optional[str]:
     - If already +1XXXXXXXXXX: keep as is
     - Otherwise, return None
     """
+    # Fast path: already canonical (e.g. phones from extract_contacts)
+    if len(value) == 12 and value.startswith("+1") and value[2:].isdecimal():
+        return value
     d = digits_only(value)
     if not d:
         return None
@@ -226,14 +419,54 @@ def format_us_phone_e164(value: str) -> Optional[str]:
 
 # ------------ Main enrichment routine ------------
 
-def enrich_csv(input_csv: str = INPUT_CSV) -> str:
-    """Enrich the given CSV and return the output CSV path."""
-    df = pd.read_csv(input_csv)
+def _assemble(candidates: List[str], extracted_emails: List[str], verified: Dict[str, bool]) -> Tuple[str, str, str]:
+    """Build one row's (Phone, Additional Phones, Email) values."""
+    # --- Filter the (already de-duplicated) phones ---
+    filtered: List[str] = []
+    for phone in candidates:
+        # Look up the verdict for the national (digit-only) number
+        if verified[national_number(digits_only(phone))]:
+            # Normalize to +1XXXXXXXXXX so all phones include the +1 prefix
+            normalized = format_us_phone_e164(phone)
+            if normalized:
+                filtered.append(normalized)
+
+    # Decide Phone vs Additional Phones
+    # (comma-separated additional phones as requested)
+    phone = filtered[0] if filtered else ""
+    addl_phones = ", ".join(filtered[1:])
+
+    # Emails: validate, dedupe (case-insensitive), and join with comma
+    valid_emails: List[str] = []
+    seen_emails = set()
+    for em in extracted_emails:
+        em_str = (em or "").strip()
+        if "sentry" in em_str.lower():
+            continue
+        if not em_str:
+            continue
+        # Syntax only here; the DNS check runs once per domain
+        try:
+            info = validate_email(em_str, check_deliverability=False)
+        except EmailNotValidError:
+            continue
+        if not domain_accepts_email(info.ascii_domain):
+            continue
+        normalized = info.email.lower()
+        if normalized in seen_emails:
+            continue
+        seen_emails.add(normalized)
+        valid_emails.append(normalized)
+
+    return phone, addl_phones, ", ".join(valid_emails)
+
+
+def enrich_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Enrich a DataFrame in memory and return the enriched copy.
 
-    # Prepare new columns
-    phones_col: List[str] = []
-    addl_phones_col: List[str] = []
-    email_col: List[str] = []
+    Adds Phone, Additional Phones and Email columns and drops phone_number.
+    """
+    df = df.copy()
 
     # Use existing columns if they exist, otherwise create stubs for safe access
     if "website" not in df.columns:
@@ -243,25 +476,35 @@ def enrich_csv(input_csv: str = INPUT_CSV) -> str:
     if "phone_number" not in df.columns:
         df["phone_number"] = ""
     
-    for _, row in df.iterrows():
+    # Column-wise string cleanup before the row loop, materialized as plain
+    # object arrays so the loops below never go through pandas indexing:
+    # CSV phones get '-' removed for saving (only digits are used for verification)
+    csv_phones = df["phone_number"].fillna("").astype(str).str.replace("-", "", regex=False).str.strip().to_numpy(dtype=object)
+    # each distinct website is normalized once
+    websites = df["website"].fillna("").astype(str).to_numpy(dtype=object)
+    url_by_website = {website: normalize_url(website) for website in set(websites) if website}
+    norm_urls = [url_by_website.get(website) for website in websites]
+
+    # Download all pages concurrently
+    pages = fetch_pages(url for url in norm_urls if url)
+
+    # Pre-pass: gather each row's candidate phones and extracted emails.
+    # Walk only the columns we need instead of building a Series per row
+    rows: List[Tuple[List[str], List[str]]] = []
+    for csv_phone_for_save, norm_url in zip(csv_phones, norm_urls):
         # --- Gather a list of candidate phones ---
         candidates: List[str] = []
 
-        # 1) From the CSV phone_number column: strip '-' for saving, but only digits for verification
-        raw_csv_phone = row.get("phone_number", "")
-        csv_phone_for_save = clean_csv_phone_for_save(raw_csv_phone)
+        # 1) From the CSV phone_number column
         if csv_phone_for_save:
             candidates.append(csv_phone_for_save)
 
         # 2) From the website content (if available)
-        row_website = row.get("website", "")
-        norm_url = normalize_url(row_website) if row_website else None
-
         extracted_emails: List[str] = []
         extracted_phones: List[str] = []
 
         if norm_url:
-            html = fetch_page_text(norm_url)
+            html = pages[norm_url]
             if html:
                 contacts = extract_contacts(html)
                 extracted_emails = contacts.get("emails", []) or []
@@ -270,71 +513,41 @@ def enrich_csv(input_csv: str = INPUT_CSV) -> str:
         # Add extracted phones to candidates
         candidates.extend(extracted_phones)
 
-        # --- Filter and de-duplicate phones ---
-        filtered: List[str] = []
-        for phone in dedupe_preserve_order(candidates):
-            # Convert to int for verification: use digit-only representation
-            d = digits_only(phone)
-            if not d:
-                continue
-            try:
-                n = int(d)
-            except Exception:
-                continue
-
-            if verify_phone(n):
-                # Normalize to +1XXXXXXXXXX so all phones include the +1 prefix
-                normalized = format_us_phone_e164(phone)
-                if normalized:
-                    filtered.append(normalized)
-
-        # Decide Phone vs Additional Phones
-        if not filtered:
-            phones_col.append("")
-            addl_phones_col.append("")
-        elif len(filtered) == 1:
-            phones_col.append(filtered[0])
-            addl_phones_col.append("")
-        else:
-            phones_col.append(filtered[0])
-            # Comma-separated additional phones as requested
-            addl_phones_col.append(", ".join(filtered[1:]))
-
-        # Emails: validate, dedupe (case-insensitive), and join with comma
-        valid_emails: List[str] = []
-        seen_emails = set()
-        for em in extracted_emails:
-            em_str = (em or "").strip()
-            if "sentry" in em_str.lower():
-                continue
-            if not em_str:
-                continue
-            try:
-                info = validate_email(em_str, check_deliverability=True)
-                normalized = info.email.lower()
-            except EmailNotValidError:
-                continue
-            if normalized in seen_emails:
-                continue
-            seen_emails.add(normalized)
-            valid_emails.append(normalized)
+        rows.append((dedupe_preserve_order(candidates), extracted_emails))
+
+    # Verify every distinct number once, in parallel (verify_phone is blocking HTTP)
+    verified = verify_phones(digits_only(phone) for candidates, _ in rows for phone in candidates)
 
-        email_col.append(", ".join(valid_emails) if valid_emails else "")
+    # Assemble the output columns with one comprehension over the gathered rows
+    assembled = [_assemble(candidates, extracted_emails, verified) for candidates, extracted_emails in rows]
+    phones_col, addl_phones_col, email_col = map(list, zip(*assembled)) if assembled else ([], [], [])
 
     # Attach new columns
     df["Phone"] = phones_col
     df["Additional Phones"] = addl_phones_col
     df["Email"] = email_col
 
+    save_verify_cache()
+
+    # Drop the original phone_number column (now represented by Phone)
+    df.drop(columns=["phone_number"], inplace=True, errors="ignore")
+
+    return df
+
+
+def enrich_csv(input_csv: str = INPUT_CSV) -> str:
+    """Enrich the given CSV and return the output CSV path."""
+    # Read every column as plain text: no per-column type inference or NaN
+    # detection to pay for, and an all-digit phone column with blanks can't be
+    # inferred as float (5125551234.0) and gain a bogus trailing digit
+    df = enrich_df(pd.read_csv(input_csv, dtype=str, keep_default_na=False))
+
     # Compute output file path with -enriched suffix
     base, ext = os.path.splitext(input_csv)
     if not ext:
         ext = ".csv"
     output_csv = f"{base}-enriched{ext}"
 
-    # Drop the original phone_number column (now represented by Phone)
-    df.drop(columns=["phone_number"], inplace=True, errors="ignore")
-
     # Save enriched CSV
     df.to_csv(output_csv, index=False)
 
@@ -344,4 +557,4 @@ def enrich_csv(input_csv: str = INPUT_CSV) -> str:
 if __name__ == "__main__":
     out = enrich_csv(INPUT_CSV)
     print(f"Enriched CSV written to: {out}")
-    # print(verify_phone("+1 351-213-7734"))
\ No newline at end of file
+    # print(verify_phone(digits_only("+1 351-213-7734")))
\ No newline at end of file
@@ -14,43 +14,127 @@ USAGE:
 """
 
 import os
+import re
+import shutil
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from tools import digits_only
 
 # ============================================================
 # CONFIGURATION - Change these values as needed
 # ============================================================
 INPUT_FOLDER = "output"  # Folder containing CSV files to fix
 OUTPUT_FOLDER = "fixed"  # Folder where fixed CSVs will be saved
+CHUNK_ROWS = 200_000  # Rows read, fixed and written at a time
+MAX_WORKERS = None  # Files fixed in parallel (None = one process per CPU core)
 # ============================================================
 
+_TRAILING_ZERO = re.compile(r'\.0$')
+
 
-def add_plus1(phone_str):
+def add_plus1(phone: str) -> str:
     """Add +1 prefix to phone number if not present."""
-    if pd.isna(phone_str) or phone_str == '' or str(phone_str).lower() == 'nan':
+    phone = phone.strip()
+    if phone.lower() == 'nan':
         return ''
-    phone_str = str(phone_str).strip()
-    
     # Remove .0 if present (from pandas reading as float)
-    if phone_str.endswith('.0'):
-        phone_str = phone_str[:-2]
+    phone = _TRAILING_ZERO.sub('', phone)
     
-    if not phone_str.startswith('+'):
-        # Remove any non-digit characters first
-        digits = ''.join(filter(str.isdigit, phone_str))
+    # Only numbers without a leading + get a prefix, based on their digit count
+    if not phone.startswith('+'):
+        digits = digits_only(phone)
         if len(digits) == 10:
             return '+1' + digits
         elif len(digits) == 11 and digits.startswith('1'):
             return '+' + digits
-        elif digits:  # Any other digits, try to format
-            return '+1' + digits if len(digits) == 10 else phone_str
-    return phone_str
+    return phone
+
+
+def fix_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fix phone numbers and emails of one block of rows in place.
+    
+    Phone, Additional Phones and Email are walked together in a single pass
+    and the results written back as whole columns.
+    
+    Args:
+        df: Rows read from an output CSV (all columns as str)
+    
+    Returns:
+        The same DataFrame, fixed
+    """
+    fix_phone = 'Phone' in df.columns
+    fix_addl_phones = fix_phone and 'Additional Phones' in df.columns
+    # Skipped if the Additional Emails column already exists
+    split_emails = 'Email' in df.columns and 'Additional Emails' not in df.columns
+    
+    def column(name, wanted):
+        return df[name].fillna('').astype(str).to_numpy() if wanted else [''] * len(df)
+    
+    phones_col, addl_phones_col, email_col, addl_emails_col = [], [], [], []
+    for phone, addl_phones, email in zip(
+        column('Phone', fix_phone),
+        column('Additional Phones', fix_addl_phones),
+        column('Email', split_emails),
+    ):
+        # Add +1 to Phone
+        phone = add_plus1(phone)
+        phones_col.append(phone)
+        
+        # Additional Phones: add +1, filter out the main phone and repeats
+        addl_phones = addl_phones.strip()
+        if addl_phones and addl_phones != 'nan':
+            phones = (add_plus1(p) for p in addl_phones.split(','))
+            addl_phones_col.append(', '.join(dict.fromkeys(p for p in phones if p and p != phone)))
+        else:
+            addl_phones_col.append('')
+        
+        # Split Email into the first email and the rest, dropping blanks
+        emails = [e for e in (e.strip() for e in email.split(',')) if e]
+        email_col.append(emails[0] if emails else '')
+        addl_emails_col.append(', '.join(emails[1:]))
+    
+    if fix_phone:
+        df['Phone'] = phones_col
+    if fix_addl_phones:
+        df['Additional Phones'] = addl_phones_col
+    if split_emails:
+        df['Email'] = email_col
+        df['Additional Emails'] = addl_emails_col
+    
+    return df
+
+
+def is_up_to_date(input_path: str, output_path: str) -> bool:
+    """Check whether output_path exists and is newer than input_path."""
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def looks_fixed(input_path: str, probe_rows: int = 256) -> bool:
+    """
+    Probe the first rows of a CSV for signs that it was already fixed:
+    an Additional Emails column and a + prefix on every Phone.
+    """
+    head = pd.read_csv(input_path, nrows=probe_rows, dtype=str, na_filter=False)
+    if 'Additional Emails' not in head.columns or 'Phone' not in head.columns:
+        return False
+    phones = head['Phone'].str.strip()
+    return bool(phones[phones != ''].str.startswith('+').all())
 
 
 def fix_csv(input_path: str, output_dir: str = "fixed") -> str:
     """
     Fix a CSV file by processing phone numbers and emails.
     
+    The file is streamed CHUNK_ROWS rows at a time, so memory use stays
+    bounded no matter how large the input is. Files whose output is newer
+    than the input, or that are already fixed, are skipped.
+    
     Args:
         input_path: Path to the input CSV file
         output_dir: Directory to save the fixed CSV (default: "fixed")
@@ -60,58 +144,6 @@ def fix_csv(input_path: str, output_dir: str = "fixed") -> str:
     """
     print(f"\nProcessing: {input_path}")
     
-    # Read the CSV with Phone columns as strings to prevent float conversion
-    df = pd.read_csv(input_path, dtype={'Phone': str, 'Additional Phones': str})
-    
-    # Process Phone columns: ensure +1 prefix and remove duplicates between Phone and Additional Phones
-    
-    # Add +1 to Phone column
-    if 'Phone' in df.columns:
-        df['Phone'] = df['Phone'].apply(add_plus1)
-        print(f"  ✓ Fixed Phone column ({df['Phone'].notna().sum()} entries)")
-    
-    # Process Additional Phones: add +1 and remove duplicates with Phone column
-    if 'Additional Phones' in df.columns and 'Phone' in df.columns:
-        def clean_additional_phones(row):
-            main_phone = str(row.get('Phone', '')).strip()
-            addl_phones = str(row.get('Additional Phones', '')).strip()
-            
-            if not addl_phones or addl_phones == 'nan':
-                return ''
-            
-            # Split by comma, add +1, and filter out the main phone
-            phones = [add_plus1(p.strip()) for p in addl_phones.split(',')]
-            phones = [p for p in phones if p and p != main_phone]
-            
-            return ', '.join(phones) if phones else ''
-        
-        df['Additional Phones'] = df.apply(clean_additional_phones, axis=1)
-        print(f"  ✓ Fixed Additional Phones column")
-    
-    # Split Email column into Email and Additional Emails
-    if 'Email' in df.columns:
-        def split_emails(email_str):
-            """Split comma-separated emails into first email and additional emails."""
-            if pd.isna(email_str) or email_str == '':
-                return '', ''
-            
-            emails = [e.strip() for e in str(email_str).split(',') if e.strip()]
-            if not emails:
-                return '', ''
-            elif len(emails) == 1:
-                return emails[0], ''
-            else:
-                return emails[0], ', '.join(emails[1:])
-        
-        # Check if Additional Emails column already exists
-        if 'Additional Emails' not in df.columns:
-            df[['Email', 'Additional Emails']] = df['Email'].apply(
-                lambda x: pd.Series(split_emails(x))
-            )
-            print(f"  ✓ Split Email into Email and Additional Emails")
-        else:
-            print(f"  ℹ Email columns already split, skipping")
-    
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
@@ -119,8 +151,48 @@ def fix_csv(input_path: str, output_dir: str = "fixed") -> str:
     input_filename = os.path.basename(input_path)
     output_path = os.path.join(output_dir, input_filename)
     
-    # Save the fixed CSV
-    df.to_csv(output_path, index=False)
+    # Nothing to do if this file was fixed before (re-runs, incremental pipelines)
+    if is_up_to_date(input_path, output_path):
+        print(f"  ℹ Output is newer than input, skipping")
+        return output_path
+    if looks_fixed(input_path):
+        shutil.copyfile(input_path, output_path)
+        print(f"  ℹ Already fixed, copied to: {output_path}")
+        return output_path
+    
+    # Read every column as a string to prevent float conversion of phones;
+    # blanks stay '' so the NA scan can be skipped entirely
+    reader = pd.read_csv(input_path, chunksize=CHUNK_ROWS, dtype=str, na_filter=False)
+    
+    # Fix and save the CSV block by block (first block writes the header).
+    # Written to a temp file first so a failed run never leaves a partial
+    # output that would look up to date
+    tmp_path = output_path + ".tmp"
+    columns = pd.Index([])
+    total_rows = 0
+    try:
+        for i, df in enumerate(reader):
+            if i == 0:
+                columns = df.columns
+            total_rows += len(df)
+            fix_frame(df).to_csv(tmp_path, index=False, mode='w' if i == 0 else 'a', header=(i == 0))
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    if 'Phone' in columns:
+        print(f"  ✓ Fixed Phone column ({total_rows} entries)")
+    if 'Additional Phones' in columns and 'Phone' in columns:
+        print(f"  ✓ Fixed Additional Phones column")
+    if 'Email' in columns:
+        if 'Additional Emails' not in columns:
+            print(f"  ✓ Split Email into Email and Additional Emails")
+        else:
+            print(f"  ℹ Email columns already split, skipping")
     print(f"  ✓ Saved to: {output_path}")
     
     return output_path
@@ -163,13 +235,16 @@ def main():
     fixed_files = []
     errors = []
     
-    for csv_file in csv_files:
-        try:
-            fixed_path = fix_csv(csv_file, output_dir)
-            fixed_files.append(fixed_path)
-        except Exception as e:
-            print(f"\n✗ Error processing {csv_file}: {e}")
-            errors.append(csv_file)
+    # Files are independent, so each one is fixed in its own process
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {csv_file: executor.submit(fix_csv, csv_file, output_dir) for csv_file in csv_files}
+        for csv_file, future in futures.items():
+            try:
+                fixed_path = future.result()
+                fixed_files.append(fixed_path)
+            except Exception as e:
+                print(f"\n✗ Error processing {csv_file}: {e}")
+                errors.append(csv_file)
     
     # Summary
     print("\n" + "="*60)
@@ -2,7 +2,7 @@
    & Playwright to scrape/extract data from Google Maps"""
 
 from playwright.sync_api import sync_playwright
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, fields
 import pandas as pd
 import argparse
 import os
@@ -35,8 +35,9 @@ class BusinessList:
 
         Returns: pandas dataframe
         """
-        return pd.json_normalize(
-            (asdict(business) for business in self.business_list), sep="_"
+        return pd.DataFrame.from_records(
+            [asdict(business) for business in self.business_list],
+            columns=[f.name for f in fields(Business)],
         )
 
     def save_to_excel(self, filename):